@@ -10,14 +10,12 @@ Purpose:
 - Provides a home route to verify the app runs.
 """
 
+from types import MappingProxyType
+
 from flask import Flask, render_template
+from jinja2 import FileSystemBytecodeCache
 from flask_wtf.csrf import CSRFProtect
 
-# Import Blueprints
-from app.auth.routes import auth_bp
-from app.notes.routes import notes_bp
-from app.admin.routes import admin_bp
-
 # Import database helper
 from app.db import init_app as init_db
 
@@ -31,12 +29,27 @@ from flask_login import LoginManager
 
 # Import Flask-Talisman v2.3.1
 from flask_talisman import Talisman
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app.limiter import limiter
 
 # Import audit logging
 from app.audit import setup_logging
 
+# Import RBAC role memoization (v2.2.1)
+from app.rbac import clear_role
+
+# Content Security Policy (v2.3.1) - immutable, shared by every app instance
+_CSP_POLICY = MappingProxyType({
+    'default-src': "'self'",
+    'script-src': "'self' 'unsafe-inline'",  # Allow inline scripts for Flask debug toolbar (dev only)
+    'style-src': "'self' 'unsafe-inline'",  # Allow inline styles (dev only - remove in production)
+    'img-src': "'self' data:",
+    'font-src': "'self'",
+    'connect-src': "'self'",
+    'frame-ancestors': "'none'",
+    'base-uri': "'self'",
+    'form-action': "'self'"
+})
+
 def create_app():
     """
     Factory function for creating and configuring the Flask app.
@@ -56,6 +69,11 @@ def create_app():
     # Step 1.5: Load configuration from config.py (Config class)
     app.config.from_object("config.Config")
 
+    # Step 1.55: Outside debug, reuse compiled templates across restarts
+    # (TEMPLATES_AUTO_RELOAD follows DEBUG, so files aren't re-stat()ed per render)
+    if not app.debug:
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
     # Step 1.6: Initialise Flask-Talisman (v2.3.1)
     # Security headers: CSP, HSTS, X-Frame-Options, etc.
     talisman = Talisman(
@@ -63,17 +81,7 @@ def create_app():
         force_https=False,  # Set to True in production
         strict_transport_security=True,
         strict_transport_security_max_age=31536000,  # 1 year
-        content_security_policy={
-            'default-src': "'self'",
-            'script-src': "'self' 'unsafe-inline'",  # Allow inline scripts for Flask debug toolbar (dev only)
-            'style-src': "'self' 'unsafe-inline'",  # Allow inline styles (dev only - remove in production)
-            'img-src': "'self' data:",
-            'font-src': "'self'",
-            'connect-src': "'self'",
-            'frame-ancestors': "'none'",
-            'base-uri': "'self'",
-            'form-action': "'self'"
-        },
+        content_security_policy=_CSP_POLICY,
         # Note: Nonces disabled for development (templates use inline styles)
         # In production, remove 'unsafe-inline' and use nonces properly
         frame_options='DENY',
@@ -82,13 +90,8 @@ def create_app():
     )
 
     # Step 1.7: Initialise Flask-Limiter (v2.3.1)
-    # Rate limiting to prevent brute force attacks
-    limiter = Limiter(
-        app=app,
-        key_func=get_remote_address,  # Rate limit by IP address
-        default_limits=["200 per day", "50 per hour"],  # Global limits
-        storage_uri="memory://"  # In-memory storage
-    )
+    # Rate limiting to prevent brute force attacks (limits defined in app/limiter.py)
+    limiter.init_app(app)
     # Store limiter on app for access in blueprints
     app.limiter = limiter
 
@@ -122,11 +125,18 @@ def create_app():
         from app.auth.models import User
         return User.get(user_id)
 
-    # Step 3: Register Blueprints
+    # Step 3: Register Blueprints (imported here so importing the package stays cheap)
+    from app.auth.routes import auth_bp
+    from app.notes.routes import notes_bp
+    from app.admin.routes import admin_bp
+
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(notes_bp, url_prefix="/notes")
     app.register_blueprint(admin_bp, url_prefix="/admin")
 
+    # Step 3.5: Drop the per-request memoized role (see app.rbac.current_role)
+    app.teardown_request(clear_role)
+
     # Step 4: Initialise the database
     init_db(app)
 
@@ -154,8 +164,5 @@ def create_app():
         """
         return render_template("home.html", title="Home")
 
-    # Step 8.5: Make limiter available for import
-    app.limiter = limiter
-
     # Step 9: Return the configured Flask app
     return app
\ No newline at end of file
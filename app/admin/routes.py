@@ -19,6 +19,17 @@ from flask_login import login_required
 from app.rbac import admin_required
 from app.audit import log_crud_event
 
+# Dashboard queries
+_SQL_COUNT_USERS = "SELECT COUNT(*) FROM users"
+_SQL_COUNT_NOTES = "SELECT COUNT(*) FROM notes"
+_SQL_ALL_USERS = "SELECT id, username, password FROM users ORDER BY id"
+_SQL_ALL_NOTES = """
+    SELECT notes.id, notes.title, notes.content, notes.user_id, notes.created_at, users.username
+    FROM notes 
+    LEFT JOIN users ON notes.user_id = users.id 
+    ORDER BY notes.created_at DESC
+"""
+
 # Blueprint definition
 admin_bp = Blueprint("admin", __name__)
 
@@ -37,29 +48,25 @@ def admin_home():
     """
     db = get_db()
 
-    # Fetch all users from database
-    # INSECURE: String concatenation - vulnerable to SQL injection
-    users_query = "SELECT * FROM users ORDER BY id"
-    users = db.execute(users_query).fetchall()
+    # Totals come straight from SQLite as single integers
+    user_count = db.execute(_SQL_COUNT_USERS).fetchone()[0]
+    note_count = db.execute(_SQL_COUNT_NOTES).fetchone()[0]
+
+    # Fetch all users from database (only the columns the dashboard shows)
+    # Cursors are passed to the template, which iterates rows without building lists
+    users = db.execute(_SQL_ALL_USERS)
 
     # Fetch all notes with user information (LEFT JOIN to get username)
-    # INSECURE: String concatenation - vulnerable to SQL injection
-    notes_query = """
-        SELECT notes.*, users.username 
-        FROM notes 
-        LEFT JOIN users ON notes.user_id = users.id 
-        ORDER BY notes.created_at DESC
-    """
-    notes = db.execute(notes_query).fetchall()
+    notes = db.execute(_SQL_ALL_NOTES)
 
     # v2.3.2: Log admin dashboard access
-    user_count = len(users)
-    note_count = len(notes)
     log_crud_event('READ', 'ADMIN_DASHBOARD', 'all', 'SUCCESS', details=f'Users: {user_count}, Notes: {note_count}')
 
     return render_template(
         "admin/dashboard.html",
         title="Admin Dashboard - Secure Notes",
         users=users,
-        notes=notes
-    )
\ No newline at end of file
+        notes=notes,
+        user_count=user_count,
+        note_count=note_count
+    )
@@ -7,17 +7,350 @@ Purpose:
 - Centralized audit logging for authentication and CRUD operations
 - Error logging for security events
 - Log rotation to prevent disk space issues
+- Records are written as JSON lines (one object per line) for log ingestion
 
 v2.3.2: Audit Logging & Monitoring (SR8, SR9)
 """
 
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
-from datetime import datetime
-from flask import request, has_request_context
+import queue
+import sys
+import threading
+import time
+import traceback
+from logging.handlers import QueueHandler, RotatingFileHandler
+from datetime import datetime, timezone
+from flask import g, request, has_request_context
 from flask_login import current_user
 
+# orjson serializes in C; fall back to the standard library if it isn't installed
+try:
+    import orjson
+
+    def _dumps(data):
+        return orjson.dumps(data, default=str).decode('utf-8')
+except ImportError:
+    import json
+
+    def _dumps(data):
+        return json.dumps(data, default=str, separators=(',', ':'))
+
+# Named loggers (getLogger is idempotent, so these stay valid after setup_logging)
+_audit_logger = logging.getLogger('audit')
+_error_logger = logging.getLogger('error')
+
+# The process's logging pipeline (queues, listener threads, file handlers);
+# built by the first setup_logging() call and reused by later apps
+_pipeline = None
+
+# Set from app.config['AUDIT_ENABLED'] by setup_logging; checked first by every log_* call
+_AUDIT_ENABLED = True
+
+
+class JSONLineFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+    
+    The event fields passed via extra={'audit': {...}} are merged into the
+    object next to the timestamp (ISO-8601, UTC), level and message.
+    """
+    
+    def format(self, record):
+        ts = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')
+        entry = {'ts': ts, 'lvl': record.levelname, 'msg': record.getMessage()}
+        entry.update(getattr(record, 'audit', None) or {})
+        return _dumps(entry)
+
+
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that batches formatted records in memory.
+    
+    Records are written with a single write() once `capacity` records are
+    buffered or `flush_interval` seconds have passed since the last write,
+    and the rollover check runs once per batch instead of once per record.
+    flush() forces the buffer out (used by the periodic flusher and at exit).
+    
+    The file size is tracked in-process (in encoded bytes, like the file
+    position), so the rollover check needs no syscall; it is re-synced with the real file position only after every
+    quarter of maxBytes written (covers other processes appending).
+    """
+    
+    def __init__(self, filename, capacity=200, flush_interval=0.5, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._file_size = None  # Unknown until first sync with the file
+        self._bytes_since_check = 0
+    
+    def emit(self, record):
+        """Buffer a formatted record, writing the batch when it is due."""
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.lock:
+            self._buffer.append(msg + self.terminator)
+            if (len(self._buffer) >= self.capacity
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._write_buffer()
+    
+    def handle_batch(self, records):
+        """
+        Buffer several records under one lock acquisition.
+        
+        Called by BatchQueueListener with everything it drained in one
+        wake-up; the capacity/interval check runs once for the whole batch.
+        """
+        lines = []
+        for record in records:
+            try:
+                if self.filter(record):
+                    lines.append(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        with self.lock:
+            self._buffer.extend(lines)
+            if (len(self._buffer) >= self.capacity
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._write_buffer()
+    
+    def flush(self):
+        """Write any buffered records and flush the stream."""
+        with self.lock:
+            self._write_buffer()
+    
+    def close(self):
+        """Flush buffered records before closing the file."""
+        self.flush()
+        super().close()
+    
+    def _write_buffer(self):
+        """Write the buffered batch in one call (caller holds self.lock)."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = ''.join(self._buffer)
+        self._buffer.clear()
+        try:
+            # Bytes, not characters: non-ASCII text is several bytes in UTF-8
+            size = len(data.encode(self.encoding or 'utf-8'))
+            if self.stream is None:
+                self.stream = self._open()
+            if self._should_rollover(size):
+                self.doRollover()
+                self._file_size = 0
+                self._bytes_since_check = 0
+            self.stream.write(data)
+            self.stream.flush()
+            if self._file_size is not None:
+                self._file_size += size
+                self._bytes_since_check += size
+        except Exception:
+            self.handleError(None)
+    
+    def _should_rollover(self, size):
+        """Check whether writing `size` more bytes would exceed maxBytes."""
+        if self.maxBytes <= 0:
+            return False
+        if self._file_size is None or self._bytes_since_check > self.maxBytes // 4:
+            self._file_size = self.stream.seek(0, 2)  # Re-sync with the end of file
+            self._bytes_since_check = 0
+        return self._file_size + size >= self.maxBytes
+
+
+class BatchQueueListener:
+    """
+    Background thread that drains a queue in batches of up to `batch_size`.
+    
+    Same start()/stop() interface as logging.handlers.QueueListener, but
+    its own loop (no reliance on QueueListener internals): it blocks for
+    one record, takes whatever else is already queued, and hands the batch
+    to each handler in a single handle_batch() call (falling back to
+    handle() per record for plain handlers). A burst of events costs one
+    lock/write cycle instead of one per record.
+    
+    An exception while handling a batch is reported like a handler error
+    and the thread keeps running.
+    """
+    
+    _STOP = object()  # Sentinel queued by stop()
+    
+    def __init__(self, record_queue, *handlers, batch_size=500, respect_handler_level=False):
+        self.queue = record_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.respect_handler_level = respect_handler_level
+        self._thread = None
+    
+    def start(self):
+        """Start the listener thread."""
+        self._thread = threading.Thread(target=self._run, name='audit-log-listener', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Handle everything already queued, then stop the thread."""
+        if self._thread is None:
+            return
+        self.queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+    
+    def handle_batch(self, records):
+        """Offer a batch of records to every handler."""
+        for handler in self.handlers:
+            if self.respect_handler_level:
+                selected = [r for r in records if r.levelno >= handler.level]
+            else:
+                selected = records
+            if not selected:
+                continue
+            handle_batch = getattr(handler, 'handle_batch', None)
+            if handle_batch is not None:
+                handle_batch(selected)
+            else:
+                for record in selected:
+                    handler.handle(record)
+    
+    def _run(self):
+        """Thread body: block for one record, drain the rest, handle the batch."""
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            records = [r for r in batch if r is not self._STOP]
+            if records:
+                try:
+                    self.handle_batch(records)
+                except Exception:
+                    if logging.raiseExceptions:
+                        traceback.print_exc(file=sys.stderr)
+            for _ in batch:
+                q.task_done()
+            if len(records) != len(batch):
+                break
+
+
+def _start_flush_thread(handlers, interval, stop_event):
+    """Start a daemon thread that force-flushes buffered handlers until stop_event is set."""
+    def _flush_loop():
+        while not stop_event.wait(interval):
+            for handler in handlers:
+                handler.flush()
+    
+    thread = threading.Thread(target=_flush_loop, name='audit-log-flusher', daemon=True)
+    thread.start()
+    return thread
+
+
+class _LogPipeline:
+    """
+    The audit/error logging machinery for one log directory.
+    
+    Each named logger gets one QueueHandler; a BatchQueueListener per log
+    file drains its queue into a BufferedRotatingFileHandler, and a
+    flusher thread writes out partially filled batches.
+    """
+    
+    # (logger, level, file name)
+    LOGS = (
+        (_audit_logger, logging.INFO, 'audit.log'),
+        (_error_logger, logging.ERROR, 'error.log'),
+    )
+    QUEUE_SIZE = 10000
+    
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self.queue_handlers = []
+        self.file_handlers = []
+        self.listeners = []
+        self._stop_flusher = None
+        for logger, level, filename in self.LOGS:
+            file_handler = BufferedRotatingFileHandler(
+                os.path.join(log_dir, filename),
+                maxBytes=10*1024*1024,  # 10MB
+                backupCount=5,
+                encoding='utf-8'  # Matches the byte count used for rollover
+            )
+            file_handler.setFormatter(JSONLineFormatter())
+            queue_handler = QueueHandler(queue.Queue(maxsize=self.QUEUE_SIZE))
+            logger.setLevel(level)
+            logger.addHandler(queue_handler)
+            logger.propagate = False
+            self.queue_handlers.append(queue_handler)
+            self.file_handlers.append(file_handler)
+        self.start()
+    
+    def start(self):
+        """Start the listener and flusher threads."""
+        self.listeners = []
+        for queue_handler, file_handler in zip(self.queue_handlers, self.file_handlers):
+            listener = BatchQueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+            listener.start()
+            self.listeners.append(listener)
+        self._stop_flusher = threading.Event()
+        _start_flush_thread(self.file_handlers, self.file_handlers[0].flush_interval, self._stop_flusher)
+    
+    def stop(self):
+        """Drain the queues, stop the threads and flush the files."""
+        for listener in self.listeners:
+            listener.stop()
+        self.listeners = []
+        if self._stop_flusher is not None:
+            self._stop_flusher.set()
+        for file_handler in self.file_handlers:
+            file_handler.flush()
+    
+    def close(self):
+        """Stop, detach the QueueHandlers from the loggers and close the files."""
+        self.stop()
+        for (logger, _, _), queue_handler, file_handler in zip(self.LOGS, self.queue_handlers, self.file_handlers):
+            logger.removeHandler(queue_handler)
+            file_handler.close()
+    
+    def restart_in_child(self):
+        """
+        Rebuild the threads in a forked child (threads don't survive fork).
+        
+        Fresh queues replace the inherited ones (their locks may have been
+        held mid-fork), and buffered lines are dropped: they belong to the
+        parent, which writes them itself.
+        """
+        for queue_handler in self.queue_handlers:
+            queue_handler.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        for file_handler in self.file_handlers:
+            file_handler._buffer.clear()
+            file_handler._file_size = None  # Re-sync with the shared file
+        self.start()
+
+
+def _shutdown_logging():
+    """atexit hook: drain queued records and flush buffers."""
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+def _restart_logging_in_child():
+    """os.register_at_fork hook (e.g. gunicorn --preload workers)."""
+    if _pipeline is not None:
+        _pipeline.restart_in_child()
+
+
+atexit.register(_shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_logging_in_child)
+
 
 def setup_logging(app):
     """
@@ -27,44 +360,54 @@ def setup_logging(app):
     - logs/audit.log: Authentication and CRUD operations
     - logs/error.log: Errors and security events
     
+    The named loggers only get a QueueHandler, so request handlers just
+    enqueue records. A background listener per log file owns a
+    BufferedRotatingFileHandler and does the actual file I/O off the request
+    path, draining the queue in batches of up to 500 records.
+    
+    The loggers are process-global, so the pipeline is built once per
+    process: later calls for the same log directory reuse it, and a
+    different directory replaces it (old threads stopped, handlers
+    removed). A forked child (gunicorn --preload) restarts the threads,
+    and the queues are drained and flushed at exit. The pipeline is stored
+    on app.extensions['audit_logging'].
+    
+    With AUDIT_ENABLED = False no handlers or threads are set up and every
+    log_* call returns immediately.
+    
     Args:
         app: Flask application instance
     """
-    # Create logs directory if it doesn't exist
-    log_dir = os.path.join(app.instance_path, '..', 'logs')
-    os.makedirs(log_dir, exist_ok=True)
-    
-    # Configure audit logger
-    audit_logger = logging.getLogger('audit')
-    audit_logger.setLevel(logging.INFO)
-    audit_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'audit.log'),
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    audit_formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    audit_handler.setFormatter(audit_formatter)
-    audit_logger.addHandler(audit_handler)
-    audit_logger.propagate = False
-    
-    # Configure error logger
-    error_logger = logging.getLogger('error')
-    error_logger.setLevel(logging.ERROR)
-    error_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'error.log'),
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    error_formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    error_handler.setFormatter(error_formatter)
-    error_logger.addHandler(error_handler)
-    error_logger.propagate = False
+    global _AUDIT_ENABLED, _pipeline
+    _AUDIT_ENABLED = app.config.get('AUDIT_ENABLED', True)
+    if not _AUDIT_ENABLED:
+        return
+    
+    log_dir = os.path.normpath(os.path.join(app.instance_path, '..', 'logs'))
+    if _pipeline is None or _pipeline.log_dir != log_dir:
+        # Create logs directory if it doesn't exist
+        os.makedirs(log_dir, exist_ok=True)
+        if _pipeline is not None:
+            _pipeline.close()
+        _pipeline = _LogPipeline(log_dir)
+    app.extensions['audit_logging'] = _pipeline
+
+
+def cache_request_identity():
+    """
+    Compute the audit identity (user ID, client IP) once and store it on g.
+    
+    Called lazily by the first log_* call of a request, so requests that
+    never log (static files, most page views) don't load the user for it;
+    later calls in the same request reuse the values. Call again after the
+    identity changes mid-request (e.g. after login_user()).
+    """
+    try:
+        user_id = str(current_user.id) if current_user.is_authenticated else 'anonymous'
+    except Exception:
+        user_id = 'anonymous'
+    g._audit_uid = user_id
+    g._audit_ip = request.remote_addr or 'unknown'
 
 
 def get_user_identifier():
@@ -74,12 +417,15 @@ def get_user_identifier():
     Returns:
         str: User ID if authenticated, 'anonymous' otherwise
     """
-    if has_request_context():
-        try:
-            if current_user.is_authenticated:
-                return str(current_user.id)
-        except:
-            pass
+    try:
+        return g._audit_uid
+    except AttributeError:
+        # First log call in this request: compute and cache the identity
+        if has_request_context():
+            cache_request_identity()
+            return g._audit_uid
+    except RuntimeError:
+        pass  # Outside of an application context
     return 'anonymous'
 
 
@@ -90,8 +436,14 @@ def get_client_ip():
     Returns:
         str: Client IP address or 'unknown'
     """
-    if has_request_context():
-        return request.remote_addr or 'unknown'
+    try:
+        return g._audit_ip
+    except AttributeError:
+        if has_request_context():
+            cache_request_identity()
+            return g._audit_ip
+    except RuntimeError:
+        pass  # Outside of an application context
     return 'unknown'
 
 
@@ -105,18 +457,20 @@ def log_auth_event(action, result, username=None, details=None):
         username: Username (optional, for login/register)
         details: Additional details (optional)
     """
-    logger = logging.getLogger('audit')
-    user_id = get_user_identifier()
-    ip = get_client_ip()
-    
-    message = f"USER: {user_id} | ACTION: {action} | RESULT: {result}"
-    if username:
-        message += f" | USERNAME: {username}"
-    message += f" | IP: {ip}"
-    if details:
-        message += f" | DETAILS: {details}"
+    if not _AUDIT_ENABLED:
+        return
+    logger = _audit_logger
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
-    logger.info(message)
+    logger.info('AUTH', extra={'audit': {
+        'user': get_user_identifier(),
+        'action': action,
+        'result': result,
+        'username': username,
+        'ip': get_client_ip(),
+        'details': details,
+    }})
 
 
 def log_crud_event(action, resource_type, resource_id, result, details=None):
@@ -130,18 +484,22 @@ def log_crud_event(action, resource_type, resource_id, result, details=None):
         result: Result ('SUCCESS', 'DENIED', 'NOT_FOUND')
         details: Additional details (optional)
     """
-    logger = logging.getLogger('audit')
-    user_id = get_user_identifier()
-    ip = get_client_ip()
+    if not _AUDIT_ENABLED:
+        return
+    logger = _audit_logger
+    level = logging.WARNING if result == 'DENIED' else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
     
-    message = f"USER: {user_id} | ACTION: {action}_{resource_type} | RESOURCE_ID: {resource_id} | RESULT: {result} | IP: {ip}"
-    if details:
-        message += f" | DETAILS: {details}"
-    
-    if result == 'DENIED':
-        logger.warning(message)
-    else:
-        logger.info(message)
+    logger.log(level, 'CRUD', extra={'audit': {
+        'user': get_user_identifier(),
+        'action': action,
+        'resource': resource_type,
+        'resource_id': resource_id,
+        'result': result,
+        'ip': get_client_ip(),
+        'details': details,
+    }})
 
 
 def log_error(error_type, message, details=None):
@@ -153,12 +511,54 @@ def log_error(error_type, message, details=None):
         message: Error message
         details: Additional details (optional)
     """
-    logger = logging.getLogger('error')
+    if not _AUDIT_ENABLED:
+        return
+    logger = _error_logger
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    
+    logger.error(message, extra={'audit': {
+        'error_type': error_type,
+        'user': get_user_identifier(),
+        'ip': get_client_ip(),
+        'details': details,
+    }})
+
+
+def log_access_denied(action, resource_type, resource_id, message, details=None, reason='Not owner'):
+    """
+    Log a denied CRUD attempt to both the audit log (DENIED) and the error log (403).
+    
+    Replaces a log_crud_event + log_error pair: the identity is looked up
+    once and both records are handed to their background queues in one call.
+    
+    Args:
+        action: Action type ('READ', 'UPDATE', 'DELETE')
+        resource_type: Resource type ('NOTE', etc.)
+        resource_id: Resource ID
+        message: Error log message
+        details: Error log details (optional)
+        reason: Audit log details (default 'Not owner')
+    """
+    if not _AUDIT_ENABLED:
+        return
     user_id = get_user_identifier()
     ip = get_client_ip()
     
-    log_message = f"ERROR_TYPE: {error_type} | USER: {user_id} | IP: {ip} | MESSAGE: {message}"
-    if details:
-        log_message += f" | DETAILS: {details}"
-    
-    logger.error(log_message)
\ No newline at end of file
+    if _audit_logger.isEnabledFor(logging.WARNING):
+        _audit_logger.warning('CRUD', extra={'audit': {
+            'user': user_id,
+            'action': action,
+            'resource': resource_type,
+            'resource_id': resource_id,
+            'result': 'DENIED',
+            'ip': ip,
+            'details': reason,
+        }})
+    if _error_logger.isEnabledFor(logging.ERROR):
+        _error_logger.error(message, extra={'audit': {
+            'error_type': '403',
+            'user': user_id,
+            'ip': ip,
+            'details': details,
+        }})
@@ -14,6 +14,14 @@ from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired, Length, ValidationError
 from app.db import get_db
 
+# Uniqueness check run on every registration attempt
+_SQL_USERNAME_EXISTS = "SELECT 1 FROM users WHERE username = ?"
+
+
+def strip_whitespace(value):
+    """Field filter: trim surrounding whitespace once, at form parse time."""
+    return value.strip() if isinstance(value, str) else value
+
 
 class RegistrationForm(FlaskForm):
     """
@@ -26,6 +34,7 @@ class RegistrationForm(FlaskForm):
     """
     username = StringField(
         'Username',
+        filters=[strip_whitespace],
         validators=[
             DataRequired(message='Username is required.'),
             Length(min=3, max=20, message='Username must be between 3 and 20 characters.')
@@ -56,8 +65,7 @@ class RegistrationForm(FlaskForm):
         """
         db = get_db()
         # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM users WHERE username = ?"
-        existing_user = db.execute(query, (username.data,)).fetchone()
+        existing_user = db.execute(_SQL_USERNAME_EXISTS, (username.data,)).fetchone()
         
         if existing_user:
             raise ValidationError('Username already exists. Please choose another.')
@@ -73,6 +81,7 @@ class LoginForm(FlaskForm):
     """
     username = StringField(
         'Username',
+        filters=[strip_whitespace],
         validators=[DataRequired(message='Username is required.')],
         render_kw={'placeholder': 'Enter your username'}
     )
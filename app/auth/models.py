@@ -4,7 +4,24 @@ app/auth/models.py
 User model for Flask-Login integration with RBAC (v2.2.1).
 """
 
+from flask import current_app
 from flask_login import UserMixin
+from app.cache import TTLCache
+
+# User loader query
+_SQL_USER_BY_ID = "SELECT id, username, role FROM users WHERE id = ?"
+
+# Flask-Login loads the user on every request; keep recently loaded users briefly
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 5  # seconds
+
+
+def _get_user_cache():
+    """Return the per-app user cache, creating it on first use."""
+    cache = current_app.extensions.get('user_cache')
+    if cache is None:
+        cache = current_app.extensions['user_cache'] = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+    return cache
 
 
 class User(UserMixin):
@@ -20,6 +37,10 @@ class User(UserMixin):
     v2.2.1: Added role attribute for RBAC
     """
     
+    # Fixed attribute layout: UserMixin still provides __dict__, but it is
+    # never allocated because every attribute set here lives in a slot
+    __slots__ = ('id', 'username', 'role')
+    
     def __init__(self, user_id, username, role='user'):
         """
         Initialize User instance.
@@ -38,6 +59,9 @@ class User(UserMixin):
         """
         Retrieve user from database by ID.
         
+        Recently loaded users are served from a short-lived per-app cache,
+        so repeated loads within a few seconds skip the database.
+        
         Args:
             user_id: User ID to retrieve
             
@@ -46,20 +70,33 @@ class User(UserMixin):
         """
         from app.db import get_db
         
+        cache = _get_user_cache()
+        key = str(user_id)
+        user = cache.get(key)
+        if user is not None:
+            return user
+        
         db = get_db()
         # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM users WHERE id = ?"
-        user_row = db.execute(query, (user_id,)).fetchone()
+        user_row = db.execute(_SQL_USER_BY_ID, (user_id,)).fetchone()
         
         if user_row:
-            # v2.2.1: Load role from database
-            try:
-                role = user_row['role'] or 'user'  # Handle NULL values
-            except (KeyError, IndexError):
-                role = 'user'  # Default to 'user' if role column doesn't exist
-            return User(user_row['id'], user_row['username'], role)
+            # v2.2.1: Load role from database (handle NULL values)
+            user = User(user_row['id'], user_row['username'], user_row['role'] or 'user')
+            cache[key] = user
+            return user
         return None
     
+    @staticmethod
+    def invalidate(user_id):
+        """
+        Drop a user from the loader cache (call after changing a user row).
+        
+        Args:
+            user_id: User ID whose cached instance should be discarded
+        """
+        _get_user_cache().pop(str(user_id))
+    
     def is_admin(self):
         """Check if user is an admin."""
         return self.role == 'admin'
@@ -16,51 +16,51 @@ v0.9.2: Functional baseline - INTENTIONALLY INSECURE
 - Security hardening will be added in v2.x
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
 from app.db import get_db
 import bcrypt
 from flask_login import login_user, logout_user, login_required, current_user
 from app.auth.models import User
 from app.auth.forms import RegistrationForm, LoginForm
-from app.audit import log_auth_event, log_error
+from app.audit import log_auth_event, log_error, cache_request_identity
+from app.limiter import limiter
+from flask_limiter.util import get_remote_address
 # Blueprint definition
 auth_bp = Blueprint("auth", __name__)
 
+# Page titles
+_TITLE_LOGIN = "Login - Secure Notes"
+_TITLE_REGISTER = "Register - Secure Notes"
 
-# v2.3.1: Rate limiting before_request hook
-@auth_bp.before_request
-def check_rate_limits():
-    """v2.3.1: Apply rate limiting to auth routes."""
-    if request.method == 'POST':
-        from flask import current_app, abort
-        from flask_limiter.errors import RateLimitExceeded
-        from flask_limiter.util import get_remote_address
-        limiter = getattr(current_app, 'limiter', None)
-        if limiter:
-            try:
-                # Determine limit based on endpoint
-                if request.endpoint == 'auth.register':
-                    limit_str = "3 per minute"
-                elif request.endpoint == 'auth.login':
-                    limit_str = "5 per minute"
-                else:
-                    return  # No rate limit for other endpoints
-                
-                # Apply rate limit decorator to a dummy function
-                def _check():
-                    pass
-                wrapped = limiter.limit(limit_str)(_check)
-                wrapped()
-            except RateLimitExceeded:
-                # v2.3.2: Log rate limit trigger (before abort)
-                log_error('RATE_LIMIT', f'Rate limit triggered for {request.endpoint}', details=f'IP: {get_remote_address()}, Limit: {limit_str}')
-                abort(429)
-            except Exception:
-                # If limiter not properly configured, allow request
-                pass
+# Login/registration queries
+_SQL_INSERT_USER = "INSERT INTO users (username, password, role) VALUES (?, ?, ?)"
+_SQL_USER_BY_USERNAME = "SELECT id, username, password FROM users WHERE username = ?"
+
+# Dummy hashes (one per work factor) checked when the username doesn't exist,
+# so failed logins cost the same bcrypt time whether or not the user exists
+_DUMMY_HASHES = {}
+
+
+def _get_dummy_hash():
+    """Return a bcrypt hash at the configured work factor, computed once."""
+    rounds = current_app.config['BCRYPT_ROUNDS']
+    dummy_hash = _DUMMY_HASHES.get(rounds)
+    if dummy_hash is None:
+        dummy_hash = _DUMMY_HASHES[rounds] = bcrypt.hashpw(b"dummy", bcrypt.gensalt(rounds=rounds))
+    return dummy_hash
+
+
+def _log_rate_limit(request_limit):
+    """v2.3.2: Log rate limit trigger (Flask-Limiter on_breach callback)."""
+    log_error(
+        'RATE_LIMIT',
+        f'Rate limit triggered for {request.endpoint}',
+        details=f'IP: {get_remote_address()}, Limit: {request_limit.limit}'
+    )
 
 
 @auth_bp.route("/register", methods=["GET", "POST"])
+@limiter.limit("3 per minute", methods=["POST"], on_breach=_log_rate_limit)  # v2.3.1
 def register():
     """
     User registration route - handles both GET (show form) and POST (create user).
@@ -75,7 +75,7 @@ def register():
     form = RegistrationForm()
     
     if form.validate_on_submit():
-        username = form.username.data.strip()
+        username = form.username.data  # Stripped by the form filter
         password = form.password.data
         
         db = get_db()
@@ -83,12 +83,15 @@ def register():
         # Insert new user into database
         # SECURE: Hash password with bcrypt before storing
         # v2.3.3: Use parameterized query to prevent SQL injection
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = bcrypt.hashpw(
+            password.encode('utf-8'),
+            bcrypt.gensalt(rounds=current_app.config['BCRYPT_ROUNDS'])
+        )
         # Convert bytes to string for database storage
         password_hash_str = password_hash.decode('utf-8')
-        insert_query = "INSERT INTO users (username, password, role) VALUES (?, ?, ?)"
-        db.execute(insert_query, (username, password_hash_str, 'user'))
+        cursor = db.execute(_SQL_INSERT_USER, (username, password_hash_str, 'user'))
         db.commit()
+        User.invalidate(cursor.lastrowid)
 
         # v2.3.2: Log registration event
         log_auth_event('REGISTER', 'SUCCESS', username=username)
@@ -99,12 +102,13 @@ def register():
     # GET request or validation failed - show form
     return render_template(
         "auth/register.html",
-        title="Register - Secure Notes",
+        title=_TITLE_REGISTER,
         form=form
     )
 
 
 @auth_bp.route("/login", methods=["GET", "POST"])
+@limiter.limit("5 per minute", methods=["POST"], on_breach=_log_rate_limit)  # v2.3.1
 def login():
     """
     User login route - handles both GET (show form) and POST (authenticate user).
@@ -119,7 +123,7 @@ def login():
     form = LoginForm()
     
     if form.validate_on_submit():
-        username = form.username.data.strip()
+        username = form.username.data  # Stripped by the form filter
         password = form.password.data
 
         db = get_db()
@@ -127,8 +131,7 @@ def login():
         # Authenticate user
         # SECURE: Get user by username only, then verify password hash
         # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM users WHERE username = ?"
-        user = db.execute(query, (username,)).fetchone()
+        user = db.execute(_SQL_USER_BY_USERNAME, (username,)).fetchone()
 
         if user:
             # Verify password using bcrypt
@@ -145,6 +148,9 @@ def login():
             except (ValueError, AttributeError):
                 # Invalid hash format (might be old plaintext password or corrupted)
                 user = None
+        else:
+            # Unknown username: pay the same bcrypt cost (prevents timing-based enumeration)
+            bcrypt.checkpw(password.encode('utf-8'), _get_dummy_hash())
         if user is None:
             # v2.3.2: Log failed login attempt
             log_auth_event('LOGIN', 'FAILURE', username=username, details='Invalid credentials')
@@ -152,13 +158,14 @@ def login():
             flash("Invalid username or password.", "error")
             return render_template(
                 "auth/login.html",
-                title="Login - Secure Notes",
+                title=_TITLE_LOGIN,
                 form=form
             )
 
         # SECURE: Use Flask-Login for session management
         user_obj = User(user['id'], user['username'])
         login_user(user_obj, remember=False)
+        cache_request_identity()  # Identity changed mid-request
 
         # v2.3.2: Log successful login
         log_auth_event('LOGIN', 'SUCCESS', username=username)
@@ -169,7 +176,7 @@ def login():
     # GET request - show login form
     return render_template(
         "auth/login.html",
-        title="Login - Secure Notes",
+        title=_TITLE_LOGIN,
         form=form
     )
 
@@ -0,0 +1,78 @@
+"""
+app/cache.py
+------------
+Small in-process cache helper for the Secure Notes App.
+
+Purpose:
+- Provide a size-bounded, time-limited cache without an extra dependency
+- Lets hot, rarely-changing lookups (e.g. the Flask-Login user loader) skip the database
+"""
+
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Size-bounded mapping whose entries expire `ttl` seconds after being set.
+
+    When full, expired entries are dropped first, then the oldest entry.
+    Safe to share between request threads.
+    """
+
+    def __init__(self, maxsize=1024, ttl=5):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept
+            ttl: Seconds an entry stays valid after being set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for key, or default if missing/expired.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.pop(key)
+            return default
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._evict()
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key, default=None):
+        """
+        Remove key from the cache and return its value (or default).
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _evict(self):
+        """Make room for one entry (caller holds the lock)."""
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._data.items() if expires_at < now]:
+            del self._data[key]
+        if len(self._data) >= self.maxsize:
+            # Dicts keep insertion order, so the first key is the oldest
+            del self._data[next(iter(self._data))]
@@ -4,25 +4,158 @@ app/db.py
 SQLite helper for the Secure Notes App (insecure baseline for v0.4).
 """
 
+import atexit
+import os
 import sqlite3
+import threading
+import weakref
 from pathlib import Path
 from flask import current_app, g
 
+# Process-wide pool of idle connections: {db_path: [connection, ...]}.
+# get_db() checks one out for the app context and close_db() returns it, so
+# reuse works even when every request runs on a new thread (Werkzeug's
+# threaded dev server) as well as with long-lived worker threads
+POOL_SIZE = 8  # Idle connections kept per database; extras are closed
+_idle = {}
+_idle_lock = threading.Lock()
+
+# Every open pooled connection (idle or checked out), so they can be closed at shutdown
+_all_connections = weakref.WeakSet()
+
+# Connections inherited from the parent on fork; never used (or closed) by the child
+_inherited = []
+
+
+class _PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that remembers whether it was closed."""
+
+    closed = False
+
+    def close(self):
+        if not self.closed:
+            # SQLite's recommended way to keep planner statistics current:
+            # ANALYZE only the tables this connection's queries would benefit
+            # from (usually a no-op, so cheap enough for every close)
+            try:
+                self.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass  # e.g. database locked; the next close will try again
+        self.closed = True
+        super().close()
+
 
 def get_db():
     """Retrieve a database connection tied to the Flask app context."""
-    if "db" not in g:
-        db_path = Path(current_app.instance_path) / "secure_notes.db"
-        g.db = sqlite3.connect(db_path)
-        g.db.row_factory = sqlite3.Row
-    return g.db
+    # One g lookup on the hot path (repeat calls in a request are O(1))
+    db = getattr(g, "db", None)
+    if db is None:
+        db_path = current_app.config.get("DATABASE") or str(
+            Path(current_app.instance_path) / "secure_notes.db"
+        )
+        g.db = db = _pooled_connection(db_path)
+    return db
+
+
+def _pooled_connection(db_path):
+    """
+    Check out an idle connection to db_path, or open a new one.
+
+    connect + PRAGMA setup only happens when the pool is empty, i.e. at
+    most once per concurrently active request, not once per request.
+    """
+    with _idle_lock:
+        idle = _idle.get(db_path)
+        if idle:
+            return idle.pop()
+    # Larger statement cache so every hot query stays prepared (default 128)
+    # check_same_thread=False: a connection serves one request at a time,
+    # but successive requests may run on different threads
+    # "file:" URIs allow e.g. a shared in-memory database for tests
+    db = sqlite3.connect(db_path, cached_statements=256, check_same_thread=False,
+                         uri=db_path.startswith("file:"), factory=_PooledConnection)
+    db.row_factory = sqlite3.Row
+    _apply_pragmas(db)
+    db.db_path = db_path
+    _all_connections.add(db)
+    return db
+
+
+def _release_connection(db):
+    """
+    Return a checked-out connection to the pool (or close it if the pool is full).
+
+    Any transaction left uncommitted (e.g. by a request that raised) is
+    rolled back so it can't leak into the next request.
+    """
+    if db.closed:
+        return
+    if db.in_transaction:
+        db.rollback()
+    with _idle_lock:
+        idle = _idle.setdefault(db.db_path, [])
+        if len(idle) < POOL_SIZE:
+            idle.append(db)
+            return
+    db.close()
+
+
+def _apply_pragmas(db):
+    """
+    Tune a new connection for the app's read-heavy, small-write workload.
+
+    - WAL journal: readers don't block the writer, one fsync per commit
+    - synchronous=NORMAL: safe with WAL (no corruption, only the last
+      commits may roll back on power loss)
+    """
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
 
 
 def close_db(e=None):
-    """Close the database connection if one exists."""
+    """Release the app context's connection back to the pool."""
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        _release_connection(db)
+
+
+def close_connections(db_path=None):
+    """
+    Close pooled connections (all of them, or only those to db_path).
+
+    Registered at exit; tests call it to discard their in-memory database.
+    Call it only when no request is using the connections.
+    """
+    if db_path is not None:
+        db_path = str(db_path)
+    with _idle_lock:
+        for path in [p for p in _idle if db_path is None or p == db_path]:
+            del _idle[path]
+    for db in list(_all_connections):
+        if db_path is None or db.db_path == db_path:
+            db.close()
+            _all_connections.discard(db)
+
+
+def _forget_connections_in_child():
+    """
+    os.register_at_fork hook: SQLite connections must not cross fork().
+
+    The child drops the parent's connections without closing them (closing
+    could release the parent's file locks) and opens its own on demand.
+    """
+    global _idle_lock
+    _idle_lock = threading.Lock()  # May have been held by another parent thread
+    for idle in _idle.values():
+        _inherited.extend(idle)
+    _idle.clear()
+    _inherited.extend(_all_connections)
+    _all_connections.clear()
+
+
+atexit.register(close_connections)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_connections_in_child)
 
 
 def init_db():
@@ -32,7 +165,6 @@ def init_db():
 
     with schema_path.open("r", encoding="utf-8") as f:
         db.executescript(f.read())
-
     db.commit()
 
 
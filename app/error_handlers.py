@@ -16,28 +16,42 @@ from app.audit import log_error
 def register_errorhandlers(app):
     """
     Register custom error handlers for common HTTP errors.
+
+    403/404/500 pages take no per-request data for anonymous visitors (the
+    usual source of 404s: scanners and bots), so that rendering is cached
+    per app after the first hit. Logged-in users get a fresh render because
+    the navigation shows their username and role.
     """
+    anonymous_pages = {}
+
+    def render_error_page(template, title, status):
+        if current_user.is_authenticated:
+            # Ensure current_user is available in template context
+            return render_template(template, title=title, current_user=current_user), status
+        html = anonymous_pages.get(template)
+        if html is None:
+            html = anonymous_pages[template] = render_template(
+                template, title=title, current_user=current_user
+            )
+        return html, status
 
     @app.errorhandler(403)
     def forbidden_error(error):
         # v2.3.2: Log 403 error
         log_error('403', 'Access denied', details=f'Path: {request.path}')
-        # Ensure current_user is available in template context
-        return render_template("403.html", title="Forbidden", current_user=current_user), 403
+        return render_error_page("403.html", "Forbidden", 403)
 
     @app.errorhandler(404)
     def not_found_error(error):
         # v2.3.2: Log 404 error
         log_error('404', 'Resource not found', details=f'Path: {request.path}')
-        # Ensure current_user is available in template context
-        return render_template("404.html", title="Not Found", current_user=current_user), 404
+        return render_error_page("404.html", "Not Found", 404)
 
     @app.errorhandler(500)
     def internal_error(error):
         # v2.3.2: Log 500 error
         log_error('500', 'Internal server error', details=f'Path: {request.path}')
-        # Ensure current_user is available in template context
-        return render_template("500.html", title="Server Error", current_user=current_user), 500
+        return render_error_page("500.html", "Server Error", 500)
 
     @app.errorhandler(429)
     def ratelimit_handler(e):
@@ -0,0 +1,24 @@
+"""
+app/limiter.py
+--------------
+Shared Flask-Limiter instance for the Secure Notes App (v2.3.1).
+
+Purpose:
+- Create the limiter once at import time so blueprints can apply static
+  @limiter.limit(...) decorators to their routes
+- Bound to the Flask app in create_app() via limiter.init_app(app)
+- Storage backend and strategy come from config (RATELIMIT_STORAGE_URI,
+  RATELIMIT_STRATEGY) so multi-worker deployments can share counters
+"""
+
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+# Global rate limits (v2.3.1)
+DEFAULT_LIMITS = ("200 per day", "50 per hour")
+
+# Rate limiting to prevent brute force attacks
+limiter = Limiter(
+    key_func=get_remote_address,  # Rate limit by IP address
+    default_limits=list(DEFAULT_LIMITS)  # Global limits
+)
@@ -12,6 +12,7 @@ Purpose:
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SubmitField
 from wtforms.validators import DataRequired, Length
+from app.auth.forms import strip_whitespace
 
 
 class NoteForm(FlaskForm):
@@ -21,9 +22,13 @@ class NoteForm(FlaskForm):
     Validators:
     - Title: Required, max 200 characters
     - Content: Required, max 10000 characters
+    
+    Fields, validators and filters are built once at class level and shared
+    by every request's form instance; values are stripped at parse time.
     """
     title = StringField(
         'Title',
+        filters=[strip_whitespace],
         validators=[
             DataRequired(message='Title is required.'),
             Length(max=200, message='Title must be less than 200 characters.')
@@ -33,6 +38,7 @@ class NoteForm(FlaskForm):
     
     content = TextAreaField(
         'Content',
+        filters=[strip_whitespace],
         validators=[
             DataRequired(message='Content is required.'),
             Length(max=10000, message='Content must be less than 10000 characters.')
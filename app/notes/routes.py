@@ -15,16 +15,78 @@ v0.9.1: Functional baseline - INTENTIONALLY INSECURE
 - Security hardening will be added in v2.x
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, abort
+import threading
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, session, abort
 from app.db import get_db
 from flask_login import login_required, current_user
 from app.notes.forms import NoteForm
-from app.rbac import check_note_ownership, can_edit_note, can_delete_note, can_view_note
-from app.audit import log_crud_event, log_error
+from app.rbac import fetch_note_for, current_role, _MODERATOR_ROLES, _SQL_NOTE_OWNER
+from app.audit import log_crud_event, log_access_denied
+from app.cache import TTLCache
 
 # Blueprint definition
 notes_bp = Blueprint("notes", __name__)
 
+# Dashboard page size (bounds rows read per request)
+NOTES_PER_PAGE = 20
+
+# Admin/moderator "all notes" pages are the same for every privileged reader;
+# keep their query results briefly (the page itself is still rendered per user)
+DASHBOARD_CACHE_SIZE = 64
+DASHBOARD_CACHE_TTL = 15  # seconds
+# The cache (and its version) is per process: with several workers, a write
+# only invalidates its own worker, so other workers can serve pages up to one
+# TTL stale
+_dashboard_version_lock = threading.Lock()
+
+# Columns the note templates use (explicit, so schema additions aren't read for free)
+_NOTE_COLUMNS = "id, title, content, user_id, created_at"
+_SQL_NOTE_BY_ID = f"SELECT {_NOTE_COLUMNS} FROM notes WHERE id = ?"
+_SQL_ALL_NOTES_PAGE = (
+    f"SELECT {_NOTE_COLUMNS} FROM notes "
+    "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+)
+_SQL_USER_NOTES_PAGE = (
+    f"SELECT {_NOTE_COLUMNS} FROM notes WHERE user_id = ? "
+    "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+)
+# Deletes the note only if the current user may (owner, or moderator/admin
+# when the third parameter is true) and returns its owner (SQLite >= 3.35)
+_SQL_DELETE_NOTE = "DELETE FROM notes WHERE id = ? AND (user_id = ? OR ?) RETURNING user_id"
+
+
+def _paginate(total, page):
+    """
+    Clamp the requested page to the notes that exist.
+    
+    Returns:
+        (page_count, page, offset) - a page past the end shows the last page
+    """
+    page_count = max((total + NOTES_PER_PAGE - 1) // NOTES_PER_PAGE, 1)
+    page = min(page, page_count)
+    return page_count, page, (page - 1) * NOTES_PER_PAGE
+
+
+def _get_dashboard_cache():
+    """Return the per-app cache of "all notes" dashboard pages, creating it on first use."""
+    cache = current_app.extensions.get('dashboard_cache')
+    if cache is None:
+        cache = current_app.extensions['dashboard_cache'] = TTLCache(DASHBOARD_CACHE_SIZE, DASHBOARD_CACHE_TTL)
+    return cache
+
+
+def _invalidate_dashboard():
+    """
+    Bump the dashboard version after a committed write.
+    
+    Cached pages are keyed by version, so entries from before the write
+    (even ones stored by a request that raced with it) are never read again.
+    The increment is locked so concurrent writers can't collapse two bumps
+    into one.
+    """
+    with _dashboard_version_lock:
+        current_app.extensions['dashboard_version'] = current_app.extensions.get('dashboard_version', 0) + 1
+
 
 @notes_bp.route("/")
 @login_required
@@ -36,32 +98,52 @@ def notes_home():
     - User: Shows only their own notes
     - Moderator/Admin: Shows all notes
     
+    Notes are paginated (?page=N, NOTES_PER_PAGE per page, clamped to the
+    last page) so only one page of rows is read; the total comes from
+    COUNT(*). The admin/moderator results are cached for
+    DASHBOARD_CACHE_TTL seconds or until a note changes.
+    
     Returns:
         Renders the notes dashboard page with filtered list of notes.
     '''
     db = get_db()
+    requested_page = max(request.args.get('page', 1, type=int), 1)
+    role = current_role()
     
     # v2.2.1: Filter notes by role
-    if current_user.is_admin() or current_user.is_moderator():
-        # Admin and Moderator can see all notes
-        notes = db.execute(
-            "SELECT * FROM notes ORDER BY created_at DESC"
-        ).fetchall()
+    if role in ('admin', 'moderator'):
+        # Admin and Moderator can see all notes (shared, cached page results)
+        cache = _get_dashboard_cache()
+        version = current_app.extensions.get('dashboard_version', 0)
+        total = cache.get((version, 'total'))
+        if total is None:
+            total = db.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+            cache[(version, 'total')] = total
+        page_count, page, offset = _paginate(total, requested_page)
+        notes = cache.get((version, page))
+        if notes is None:
+            notes = db.execute(_SQL_ALL_NOTES_PAGE, (NOTES_PER_PAGE, offset)).fetchall()
+            cache[(version, page)] = notes
     else:
         # Regular users can only see their own notes
         # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM notes WHERE user_id = ? ORDER BY created_at DESC"
-        notes = db.execute(query, (current_user.id,)).fetchall()
+        total = db.execute(
+            "SELECT COUNT(*) FROM notes WHERE user_id = ?", (current_user.id,)
+        ).fetchone()[0]
+        page_count, page, offset = _paginate(total, requested_page)
+        notes = db.execute(_SQL_USER_NOTES_PAGE, (current_user.id, NOTES_PER_PAGE, offset)).fetchall()
     
     # v2.3.2: Log dashboard access
     note_count = len(notes)
-    role = 'admin' if current_user.is_admin() else 'moderator' if current_user.is_moderator() else 'user'
-    log_crud_event('READ', 'DASHBOARD', 'all', 'SUCCESS', details=f'Role: {role}, Notes shown: {note_count}')
+    log_crud_event('READ', 'DASHBOARD', 'all', 'SUCCESS', details=f'Role: {role}, Notes shown: {note_count}, Total: {total}, Page: {page}')
     
     return render_template(
         "notes/dashboard.html",
         title="Notes Dashboard - Secure Notes",
-        notes=notes
+        notes=notes,
+        role=role,
+        page=page,
+        page_count=page_count
     )
 
 @notes_bp.route("/create", methods=["GET", "POST"])
@@ -77,19 +159,20 @@ def create_note():
     form = NoteForm()
     
     if form.validate_on_submit():
-        title = form.title.data.strip()
-        content = form.content.data.strip()
+        title = form.title.data  # Stripped by the form filters
+        content = form.content.data
         user_id = current_user.id
         
         # Insert note into database
         # v2.3.3: Use parameterized query to prevent SQL injection
         db = get_db()
         insert_query = "INSERT INTO notes (title, content, user_id) VALUES (?, ?, ?)"
-        db.execute(insert_query, (title, content, user_id))
+        cursor = db.execute(insert_query, (title, content, user_id))
         db.commit()
+        _invalidate_dashboard()
+        note_id = cursor.lastrowid  # No extra last_insert_rowid() query
 
         # v2.3.2: Log note creation
-        note_id = db.execute("SELECT last_insert_rowid()").fetchone()[0]
         log_crud_event('CREATE', 'NOTE', note_id, 'SUCCESS', details=f'Title: {title[:50]}')
 
         flash("Note created successfully!", "success")
@@ -114,28 +197,19 @@ def view_note(note_id):
         note_id: ID of note to view
         
     Returns:
-        Renders note view page or 403/404 error
+        Renders note view page or 403 error
     """
+    # v2.3.3: Parameterized fetch; one query serves the RBAC check, rendering and logging
+    note, allowed = fetch_note_for('view', note_id, _SQL_NOTE_BY_ID)
+    
     # v2.2.1: Check if user can view this note
-    if not can_view_note(note_id):
+    # A missing note is refused with 403 too, so note IDs can't be probed
+    if not allowed:
         # v2.3.2: Log denied view attempt
-        db = get_db()
-        # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM notes WHERE id = ?"
-        note = db.execute(query, (note_id,)).fetchone()
         if note:
-            log_crud_event('READ', 'NOTE', note_id, 'DENIED', details='Not owner')
-            log_error('403', f'View denied for note {note_id}', details=f'User {current_user.id} attempted to view note owned by {note["user_id"]}')
+            log_access_denied('READ', 'NOTE', note_id, f'View denied for note {note_id}', details=f'User {current_user.id} attempted to view note owned by {note["user_id"]}')
         abort(403)  # Forbidden
     
-    db = get_db()
-    # v2.3.3: Use parameterized query to prevent SQL injection
-    query = "SELECT * FROM notes WHERE id = ?"
-    note = db.execute(query, (note_id,)).fetchone()
-    
-    if not note:
-        abort(404)  # Not found
-    
     # v2.3.2: Log note view
     log_crud_event('READ', 'NOTE', note_id, 'SUCCESS')
     
@@ -160,44 +234,33 @@ def edit_note(note_id):
         note_id: ID of note to edit
         
     Returns:
-        GET: Renders edit form or 403/404 error
-        POST: Updates note and redirects or 403/404 error
+        GET: Renders edit form or 403 error
+        POST: Updates note and redirects or 403 error
     """
+    # v2.3.3: Parameterized fetch; one query serves the RBAC check, rendering and logging
+    note, allowed = fetch_note_for('edit', note_id, _SQL_NOTE_BY_ID)
+    
     # v2.2.1: Check if user can edit this note
-    if not can_edit_note(note_id):
+    # A missing note is refused with 403 too, so note IDs can't be probed
+    if not allowed:
         # v2.3.2: Log denied edit attempt
-        db = get_db()
-        # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM notes WHERE id = ?"
-        note = db.execute(query, (note_id,)).fetchone()
         if note:
-            log_crud_event('UPDATE', 'NOTE', note_id, 'DENIED', details='Not owner')
-            log_error('403', f'Edit denied for note {note_id}', details=f'User {current_user.id} attempted to edit note owned by {note["user_id"]}')
+            log_access_denied('UPDATE', 'NOTE', note_id, f'Edit denied for note {note_id}', details=f'User {current_user.id} attempted to edit note owned by {note["user_id"]}')
         abort(403)  # Forbidden
     
-    db = get_db()
-    # v2.3.3: Use parameterized query to prevent SQL injection
-    query = "SELECT * FROM notes WHERE id = ?"
-    note = db.execute(query, (note_id,)).fetchone()
-    
-    if not note:
-        abort(404)  # Not found
-    
     form = NoteForm()
     
     if form.validate_on_submit():
-        title = form.title.data.strip()
-        content = form.content.data.strip()
-        
-        # v2.2.1: Double-check ownership/admin before updating
-        if not can_edit_note(note_id):
-            abort(403)
+        title = form.title.data  # Stripped by the form filters
+        content = form.content.data
         
         # Update note in database
         # v2.3.3: Use parameterized query to prevent SQL injection
+        db = get_db()
         update_query = "UPDATE notes SET title = ?, content = ? WHERE id = ?"
         db.execute(update_query, (title, content, note_id))
         db.commit()
+        _invalidate_dashboard()
         
         # v2.3.2: Log note edit
         log_crud_event('UPDATE', 'NOTE', note_id, 'SUCCESS', details=f'Title: {title[:50]}')
@@ -216,55 +279,47 @@ def edit_note(note_id):
         note=note
     )
 
-@notes_bp.route("/delete/<int:note_id>")
+@notes_bp.route("/delete/<int:note_id>", methods=["POST"])
 @login_required
 def delete_note(note_id):
     """
-    Delete note route.
+    Delete note route (POST only, CSRF-protected form).
     
     v2.2.1: RBAC check - user must own note OR be admin/moderator
     - User: Can delete own notes only
     - Moderator: Can delete any note (moderation power)
     - Admin: Can delete any note
     
+    The permission check is part of the DELETE itself, so no row the user
+    may not delete is ever touched and the check and the delete are one
+    atomic statement. Only when nothing was deleted is the owner looked up,
+    to log the denial; a missing note is refused with 403 as well.
+    
     Args:
         note_id: ID of note to delete
         
     Returns:
-        Redirects to dashboard or 403/404 error
+        Redirects to dashboard or 403 error
     """
-    # v2.2.1: Check if user can delete this note
-    if not can_delete_note(note_id):
+    # v2.3.3: Use parameterized query to prevent SQL injection
+    db = get_db()
+    can_delete_any = current_role() in _MODERATOR_ROLES
+    deleted = db.execute(_SQL_DELETE_NOTE, (note_id, current_user.id, can_delete_any)).fetchone()
+    
+    # v2.2.1: Check if user can delete this note (a row came back only if allowed)
+    # A missing note is refused with 403 too, so note IDs can't be probed
+    if deleted is None:
+        note = db.execute(_SQL_NOTE_OWNER, (note_id,)).fetchone()
         # v2.3.2: Log denied delete attempt
-        db = get_db()
-        # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM notes WHERE id = ?"
-        note = db.execute(query, (note_id,)).fetchone()
         if note:
-            log_crud_event('DELETE', 'NOTE', note_id, 'DENIED', details='Not owner')
-            log_error('403', f'Delete denied for note {note_id}', details=f'User {current_user.id} attempted to delete note owned by {note["user_id"]}')
+            log_access_denied('DELETE', 'NOTE', note_id, f'Delete denied for note {note_id}', details=f'User {current_user.id} attempted to delete note owned by {note["user_id"]}')
         abort(403)  # Forbidden
     
-    db = get_db()
-    # v2.3.3: Use parameterized query to prevent SQL injection
-    query = "SELECT * FROM notes WHERE id = ?"
-    note = db.execute(query, (note_id,)).fetchone()
-    
-    if not note:
-        abort(404)  # Not found
-    
-    # v2.2.1: Double-check ownership/admin before deleting
-    if not can_delete_note(note_id):
-        abort(403)
-    
-    # Delete note from database
-    # v2.3.3: Use parameterized query to prevent SQL injection
-    delete_query = "DELETE FROM notes WHERE id = ?"
-    db.execute(delete_query, (note_id,))
     db.commit()
+    _invalidate_dashboard()
     
     # v2.3.2: Log note deletion
     log_crud_event('DELETE', 'NOTE', note_id, 'SUCCESS')
     
     flash("Note deleted successfully!", "success")
-    return redirect(url_for("notes.notes_home"))
\ No newline at end of file
+    return redirect(url_for("notes.notes_home"))
@@ -9,10 +9,47 @@ Purpose:
 """
 
 from functools import wraps
-from flask import abort
+from flask import abort, g
 from flask_login import login_required, current_user
 from app.db import get_db
 
+# Default query for fetch_note_for(): the owner is all a permission check needs
+_SQL_NOTE_OWNER = "SELECT user_id FROM notes WHERE id = ?"
+
+# Roles with moderation rights (view/delete any note)
+_MODERATOR_ROLES = ('moderator', 'admin')
+
+
+def current_role():
+    """
+    Role of the current user, looked up once per request.
+    
+    The result is memoized on g so repeated permission checks in the same
+    request skip the user lookups; clear_role() drops it at teardown.
+    
+    Returns:
+        'admin', 'moderator' or 'user', or None for anonymous users
+    """
+    try:
+        return g._role
+    except AttributeError:
+        pass
+    if not current_user.is_authenticated:
+        role = None
+    else:
+        # One attribute read instead of chained is_admin()/is_moderator()
+        # calls; any other value gets no extra rights, i.e. a regular user
+        role = current_user.role
+        if role not in _MODERATOR_ROLES:
+            role = 'user'
+    g._role = role
+    return role
+
+
+def clear_role(exc=None):
+    """Forget the memoized role (registered as a teardown_request hook)."""
+    g.pop('_role', None)
+
 
 def admin_required(f):
     """
@@ -27,7 +64,7 @@ def admin_required(f):
     @wraps(f)
     @login_required
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_admin():
+        if current_role() != 'admin':
             abort(403)  # Forbidden
         return f(*args, **kwargs)
     return decorated_function
@@ -46,135 +83,60 @@ def moderator_required(f):
     @wraps(f)
     @login_required
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or not current_user.is_moderator():
+        if current_role() not in _MODERATOR_ROLES:
             abort(403)  # Forbidden
         return f(*args, **kwargs)
     return decorated_function
 
 
-def check_note_ownership(note_id, allow_admin=True):
-    """
-    Check if current user owns the note (or is admin if allow_admin=True).
-    
-    Args:
-        note_id: Note ID to check
-        allow_admin: If True, admins can access any note
-        
-    Returns:
-        True if user owns note or is admin, False otherwise
-        
-    Raises:
-        404: If note doesn't exist
-        403: If user doesn't have permission
+def permission_for_note(note, action):
     """
-    db = get_db()
-    # v2.3.3: Use parameterized query to prevent SQL injection
-    query = "SELECT * FROM notes WHERE id = ?"
-    note = db.execute(query, (note_id,)).fetchone()
-    
-    if not note:
-        abort(404)  # Note not found
-    
-    # Admin can access any note
-    if allow_admin and current_user.is_admin():
-        return True
+    Check if current user may perform an action on an already-fetched note.
     
-    # Check ownership
-    if note['user_id'] == current_user.id:
-        return True
-    
-    # User doesn't own note and isn't admin
-    abort(403)  # Forbidden
-
-
-def can_edit_note(note_id):
-    """
-    Check if current user can edit the note.
+    Pure check - runs no queries, so routes can fetch the note once and
+    reuse the row for rendering and logging.
     
     Rules:
-    - User: Can edit own notes only
-    - Moderator: Can edit own notes only (not others')
-    - Admin: Can edit any note
+    - Owner: Can view, edit and delete
+    - Moderator: Can view and delete any note
+    - Admin: Can view, edit and delete any note
     
     Args:
-        note_id: Note ID to check
+        note: Note row (must include 'user_id'), or None if it doesn't exist
+        action: 'view', 'edit' or 'delete'
         
     Returns:
-        True if user can edit, False otherwise
+        True if allowed, False otherwise (always False for a missing note)
     """
-    if current_user.is_admin():
-        # Admin can edit any note (but check it exists)
-        db = get_db()
-        # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM notes WHERE id = ?"
-        note = db.execute(query, (note_id,)).fetchone()
-        return note is not None
-    
-    # Regular users and moderators can only edit their own notes
-    try:
-        check_note_ownership(note_id, allow_admin=False)
-        return True
-    except:
+    if note is None:
         return False
+    return note['user_id'] == current_user.id or _role_permits(action)
 
 
-def can_delete_note(note_id):
+def fetch_note_for(action, note_id, query=_SQL_NOTE_OWNER):
     """
-    Check if current user can delete the note.
+    Fetch a note and decide whether the current user may perform action on it.
     
-    Rules:
-    - User: Can delete own notes only
-    - Moderator: Can delete any note (moderation power)
-    - Admin: Can delete any note
+    One statement serves the existence check, the permission check and the
+    caller's rendering/logging, so routes never re-query the same row.
     
     Args:
-        note_id: Note ID to check
+        action: 'view', 'edit' or 'delete'
+        note_id: Note ID to fetch
+        query: SELECT by id returning at least 'user_id' (default: owner only)
         
     Returns:
-        True if user can delete, False otherwise
+        (note, allowed) - note is None (and allowed False) if it doesn't exist
     """
-    if current_user.is_admin() or current_user.is_moderator():
-        # Admin and Moderator can delete any note (but check it exists)
-        db = get_db()
-        # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM notes WHERE id = ?"
-        note = db.execute(query, (note_id,)).fetchone()
-        return note is not None
-    
-    # Regular users can only delete their own notes
-    try:
-        check_note_ownership(note_id, allow_admin=False)
-        return True
-    except:
-        return False
+    note = get_db().execute(query, (note_id,)).fetchone()
+    return note, permission_for_note(note, action)
 
 
-def can_view_note(note_id):
-    """
-    Check if current user can view the note.
-    
-    Rules:
-    - User: Can view own notes only
-    - Moderator: Can view all notes (read-only)
-    - Admin: Can view all notes
-    
-    Args:
-        note_id: Note ID to check
-        
-    Returns:
-        True if user can view, False otherwise
-    """
-    if current_user.is_moderator() or current_user.is_admin():
-        # Moderators and admins can view all notes
-        db = get_db()
-        # v2.3.3: Use parameterized query to prevent SQL injection
-        query = "SELECT * FROM notes WHERE id = ?"
-        note = db.execute(query, (note_id,)).fetchone()
-        return note is not None
-    
-    # Regular users can only view their own notes
-    try:
-        check_note_ownership(note_id, allow_admin=False)
-        return True
-    except:
-        return False
\ No newline at end of file
+def _role_permits(action):
+    """True if the current role may perform action on any user's note."""
+    role = current_role()
+    if action == 'edit':
+        return role == 'admin'
+    if action in ('view', 'delete'):
+        return role in _MODERATOR_ROLES
+    raise ValueError(f'Unknown note action: {action}')
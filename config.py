@@ -44,9 +44,27 @@ class Config:
     # Enable/Disable debug mode (convert to boolean)
     DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 't')
     
+    # Re-check template files for changes on every render only while debugging
+    TEMPLATES_AUTO_RELOAD = DEBUG
+
     # Controls the runtime environment (Development, Production, etc.)
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
 
+    # SQLite database: a file path or a "file:" URI; unset = instance/secure_notes.db
+    DATABASE = os.getenv('DATABASE')
+
+    # Audit Logging (v2.3.2) - set to False to skip audit/error logging entirely
+    AUDIT_ENABLED = os.getenv('AUDIT_ENABLED', 'True').lower() in ('true', '1', 't')
+
+    # bcrypt work factor (each -1 halves hashing cost; use >= 12 in production)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
     # Rate Limiting (v2.3.1)
     RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
-    RATELIMIT_STORAGE_URL = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
\ No newline at end of file
+    # memory:// keeps one counter per process - with several gunicorn workers
+    # point this at a shared backend (e.g. redis://localhost:6379)
+    RATELIMIT_STORAGE_URI = os.getenv(
+        'RATELIMIT_STORAGE_URI', os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    )
+    # moving-window counts hits over a rolling period (no burst at window edges)
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'moving-window')
\ No newline at end of file
@@ -17,4 +17,9 @@ CREATE TABLE notes (
     title TEXT,
     content TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+);
+
+-- Dashboard indexes: match WHERE + ORDER BY so SQLite walks the index in output order (no sort)
+-- id is included as the tiebreaker used by the paginated dashboard
+CREATE INDEX IF NOT EXISTS idx_notes_user_created ON notes(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_notes_created ON notes(created_at DESC, id DESC);
@@ -4,51 +4,97 @@ tests/conftest.py
 Pytest configuration and fixtures for Flask app testing.
 
 v1.5.1: Basic fixtures for route testing (insecure baseline)
+
+The app and its schema are created once per session on a shared in-memory
+SQLite database; each test runs inside a SAVEPOINT that is rolled back.
 """
 
 import pytest
-import os
-import tempfile
 from app import create_app
-from app.db import get_db, init_db
+from app import db as app_db
+from app.db import get_db, init_db, close_connections
 
+# Named shared-cache in-memory DB: lives as long as a pooled connection is open
+TEST_DATABASE = 'file:secure_notes_test?mode=memory&cache=shared'
 
-@pytest.fixture
+
+@pytest.fixture(scope='session')
 def app():
     """
-    Create application for testing with temporary database.
+    Create application for testing with an in-memory database.
     
     Returns:
         Flask app instance configured for testing.
     """
-    import shutil
-    from pathlib import Path
-    
-    # Create temporary directory for instance folder (where DB will be stored)
-    instance_path = tempfile.mkdtemp()
-    
     # Create app (no parameters - create_app() doesn't accept config)
     app = create_app()
     
     # Configure for testing
     app.config['TESTING'] = True
-    app.instance_path = instance_path
-    
-    # Copy schema.sql to temporary instance path
-    schema_source = Path(__file__).parent.parent / 'instance' / 'schema.sql'
-    schema_dest = Path(instance_path) / 'schema.sql'
-    if schema_source.exists():
-        shutil.copy(schema_source, schema_dest)
+    app.config['DATABASE'] = TEST_DATABASE
+    app.config['WTF_CSRF_ENABLED'] = False  # Tests post plain form data (no token)
+    app.config['BCRYPT_ROUNDS'] = 4  # Minimum work factor keeps register/login tests fast
     
-    # Initialize database schema
+    # Initialize database schema (once per session)
     with app.app_context():
         init_db()
     
     yield app
     
-    # Cleanup: remove temporary instance directory
-    if os.path.exists(instance_path):
-        shutil.rmtree(instance_path)
+    # Cleanup: closing the last connection discards the in-memory database
+    close_connections(TEST_DATABASE)
+
+
+class _SavepointConnection:
+    """
+    Stand-in for the pooled connection while a test runs.
+    
+    The test's outer SAVEPOINT is never committed: commit() and rollback()
+    are no-ops, and the fixture undoes everything when the test ends.
+    """
+    
+    def __init__(self, conn):
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _db_transaction(app, monkeypatch):
+    """
+    Run each test inside one SAVEPOINT that is rolled back afterwards.
+    
+    Every get_db() call (requests included) gets the same wrapped
+    connection, so nothing the test writes is committed and the tables
+    (and AUTOINCREMENT counters) come back empty for the next test.
+    
+    Also resets rate limit counters and the in-process caches, which would
+    otherwise carry over between tests sharing the session app.
+    """
+    release = app_db._release_connection
+    conn = app_db._pooled_connection(TEST_DATABASE)
+    conn.execute('SAVEPOINT test')
+    wrapped = _SavepointConnection(conn)
+    # Requests check out the wrapper and must not hand it back to the pool
+    monkeypatch.setattr(app_db, '_pooled_connection', lambda db_path: wrapped)
+    monkeypatch.setattr(app_db, '_release_connection', lambda db: None)
+    
+    yield
+    
+    conn.execute('ROLLBACK TO test')
+    conn.execute('RELEASE test')
+    release(conn)
+    app.limiter.reset()
+    for cache in ('user_cache', 'dashboard_cache'):
+        if cache in app.extensions:
+            app.extensions[cache].clear()
 
 
 @pytest.fixture
@@ -76,4 +122,4 @@ def runner(app):
     Returns:
         Flask CLI test runner.
     """
-    return app.test_cli_runner()
\ No newline at end of file
+    return app.test_cli_runner()
@@ -0,0 +1,38 @@
+"""
+tests/test_errors.py
+--------------------
+Tests for the custom error pages.
+
+The anonymous 404 page is cached per app; these check that a logged-in
+user never gets that cached copy.
+"""
+
+
+def test_404_page_anonymous(client):
+    """Test 404 page renders for anonymous visitors."""
+    response = client.get('/no-such-page')
+    assert response.status_code == 404
+    assert b'Page Not Found' in response.data
+    assert b'Logout' not in response.data
+
+
+def test_404_page_not_cached_for_logged_in_user(client):
+    """Test a logged-in user gets a fresh 404 page, not the cached anonymous one."""
+    # Anonymous hit fills the cache
+    response = client.get('/no-such-page')
+    assert response.status_code == 404
+    assert b'Logout' not in response.data
+    
+    client.post('/auth/register', data={
+        'username': 'error_page_user',
+        'password': 'errorpass123'
+    })
+    client.post('/auth/login', data={
+        'username': 'error_page_user',
+        'password': 'errorpass123'
+    })
+    
+    response = client.get('/no-such-page')
+    assert response.status_code == 404
+    assert b'error_page_user' in response.data
+    assert b'Logout' in response.data
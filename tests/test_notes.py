@@ -7,6 +7,9 @@ v1.5.1: Basic route validation - status codes
 Note: No ownership checks yet (IDOR vulnerability present)
 """
 
+from app.db import get_db
+from app.notes.routes import NOTES_PER_PAGE
+
 
 def test_notes_home_get(client):
     """Test notes dashboard loads (GET request)."""
@@ -80,14 +83,111 @@ def test_edit_note_post(client):
 
 def test_delete_note(client):
     """Test note deletion."""
+    # Log in so the delete reaches the route (not the login redirect)
+    client.post('/auth/register', data={
+        'username': 'delete_user',
+        'password': 'deletepass123'
+    })
+    client.post('/auth/login', data={
+        'username': 'delete_user',
+        'password': 'deletepass123'
+    })
+    
     # First create a note
     client.post('/notes/create', data={
         'title': 'Note to Delete',
         'content': 'This will be deleted'
     })
     
+    # Delete is POST only
+    assert client.get('/notes/delete/1').status_code == 405
+    
     # Then delete it
-    response = client.get('/notes/delete/1', follow_redirects=True)
+    response = client.post('/notes/delete/1', follow_redirects=True)
     assert response.status_code == 200
-    # Should redirect to notes dashboard
-    assert b'Notes' in response.data or b'notes' in response.data
\ No newline at end of file
+    # Should redirect to notes dashboard, without the deleted note
+    assert b'Notes' in response.data or b'notes' in response.data
+    assert b'Note to Delete' not in response.data
+
+
+def _log_in(client, username, password='notespass123', role=None):
+    """Register and log in a user, optionally giving them a role first."""
+    client.post('/auth/register', data={'username': username, 'password': password})
+    if role is not None:
+        with client.application.app_context():
+            get_db().execute("UPDATE users SET role = ? WHERE username = ?", (role, username))
+    client.post('/auth/login', data={'username': username, 'password': password})
+
+
+def test_delete_note_of_other_user_denied(app, client):
+    """Test a regular user can't delete someone else's note."""
+    _log_in(client, 'note_owner')
+    client.post('/notes/create', data={
+        'title': 'Owner Note',
+        'content': 'Only the owner may delete this'
+    })
+    client.get('/auth/logout')
+    
+    _log_in(client, 'other_user')
+    response = client.post('/notes/delete/1')
+    assert response.status_code == 403
+    # A missing note is refused the same way
+    assert client.post('/notes/delete/99').status_code == 403
+    
+    with app.app_context():
+        assert get_db().execute("SELECT COUNT(*) FROM notes WHERE id = 1").fetchone()[0] == 1
+
+
+def test_dashboard_cache_sees_every_write(client):
+    """Test the cached all-notes dashboard shows creates, edits and deletes at once."""
+    _log_in(client, 'cache_admin', role='admin')
+    assert b'No notes yet' in client.get('/notes/').data
+    
+    client.post('/notes/create', data={'title': 'Cached Note', 'content': 'First version'})
+    assert b'Cached Note' in client.get('/notes/').data
+    
+    client.post('/notes/edit/1', data={'title': 'Edited Note', 'content': 'Second version'})
+    response = client.get('/notes/')
+    assert b'Edited Note' in response.data
+    assert b'Cached Note' not in response.data
+    
+    client.post('/notes/delete/1')
+    response = client.get('/notes/')
+    assert b'Edited Note' not in response.data
+    assert b'No notes yet' in response.data
+
+
+def test_dashboard_cache_not_shown_to_users(client):
+    """Test a regular user never gets the cached all-notes page."""
+    _log_in(client, 'cache_moderator', role='moderator')
+    client.post('/notes/create', data={'title': 'Moderator Note', 'content': 'Not for users'})
+    assert b'Moderator Note' in client.get('/notes/').data  # Now cached
+    client.get('/auth/logout')
+    
+    _log_in(client, 'cache_user')
+    response = client.get('/notes/')
+    assert response.status_code == 200
+    assert b'Moderator Note' not in response.data
+    assert b'No notes yet' in response.data
+
+
+def test_dashboard_pagination(client):
+    """Test the dashboard splits notes into pages and clamps bad ?page= values."""
+    _log_in(client, 'paging_user')
+    for i in range(NOTES_PER_PAGE + 1):
+        client.post('/notes/create', data={'title': f'Paged Note {i}', 'content': 'Paging'})
+    
+    response = client.get('/notes/')
+    assert b'Page 1 of 2' in response.data
+    assert b'Next' in response.data
+    
+    # Past the end shows the last page, not the empty state
+    response = client.get('/notes/?page=99')
+    assert b'Page 2 of 2' in response.data
+    assert b'No notes yet' not in response.data
+    
+    # Invalid or non-positive pages fall back to page 1
+    for page in ('abc', '0', '-3'):
+        response = client.get(f'/notes/?page={page}')
+        assert response.status_code == 200
+        assert b'Page 1 of 2' in response.data